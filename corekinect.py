@@ -1,44 +1,401 @@
+import asyncio
+import atexit
+import copy
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import json
+import threading
+import time
 import requests
-from typing import Any, List, Dict
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Any, Iterator, List, Dict, Optional, Tuple
 import logging
 
-logging.basicConfig(format='%(message)s', level=logging.DEBUG)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+logger = logging.getLogger(__name__)
 base = "https://api.corekinect.cloud:3000"
 
+URL_GET_VERSION = f"{base}/account/GetVersion"
+URL_REQUEST_TOKEN = f"{base}/auth/RequestToken"
+URL_ADD_DEVICES = f"{base}/account/AddDevices"
+URL_CREATE_ENDPOINT = f"{base}/account/CreateEndpoint"
+URL_ASSIGN_DEVICES_TO_ENDPOINT = f"{base}/account/AssignDevicesToEndpoint"
+URL_DELETE_DEVICES_FROM_ENDPOINT = f"{base}/account/DeleteDevicesFromEndpoint"
+URL_DELETE_ENDPOINTS = f"{base}/account/DeleteEndpoints"
+URL_GET_ENDPOINTS = f"{base}/account/GetEndpoints/"
+URL_GET_DEVICES = f"{base}/account/GetDevices/"
+URL_GET_DEVICES_BY_LOCATION = f"{base}/account/GetDevicesByLocation/"
+URL_GET_LOCATIONS = f"{base}/account/GetLocations/"
+URL_GET_LOCATION_REPORTS = f"{base}/account/GetLocationReports"
+
+# (connect, read) timeouts in seconds, applied to any request that does not
+# pass its own. Tune these from observed p95 latencies for the deployment.
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 30.0
+
+
+class _TimeoutAdapter(HTTPAdapter):
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+        return super().send(request, timeout=timeout, **kwargs)
+
+
+# Transient failures are retried with jittered exponential backoff. 401/403
+# are deliberately left out: a bad token will not fix itself on retry.
+_retry = Retry(total=3,
+               backoff_factor=1.0,
+               backoff_jitter=0.5,
+               status_forcelist=(429, 500, 502, 503, 504),
+               allowed_methods=frozenset({"GET", "POST", "DELETE"}),
+               respect_retry_after_header=True,
+               raise_on_status=False)
+
+# Every call goes to the same host, so share one pooled keep-alive session
+# rather than paying a fresh TCP + TLS handshake per request. There is only
+# one host to pool for; POOL_MAXSIZE caps the sockets kept open to it and
+# the number of requests the concurrent helpers put in flight at once.
+POOL_MAXSIZE = 20
+_session = requests.Session()
+_session.mount('https://', _TimeoutAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE, max_retries=_retry))
+atexit.register(_session.close)
+_token = None
+
+
+''' set_token
+    Attaches the given access token to every subsequent request
+'''
+def set_token(token: str):
+    global _token
+    _token = token
+    _session.headers['Authorization'] = f'Bearer {token}'
+
+
+# Functions still accept a token for backwards compatibility. One that differs
+# from the set_token() token is sent on that request only, never written to
+# the shared session, so concurrent callers cannot pick up each other's.
+# An empty token (e.g. get_token()'s fallback) is treated like no token.
+def _auth_headers(token: str) -> Optional[Dict[str, str]]:
+    if not token or token == _token:
+        return None
+    return {'Authorization': f'Bearer {token}'}
+
+
+# After BREAKER_FAIL_MAX consecutive failures (connection errors or 5xx once
+# retries are exhausted) calls fail fast for BREAKER_RESET_TIMEOUT seconds
+# instead of each burning its own retry and timeout budget. The first call
+# after the cooldown is let through as a trial.
+BREAKER_FAIL_MAX = 5
+BREAKER_RESET_TIMEOUT = 30.0
+
+
+class CircuitBreakerError(Exception):
+    pass
+
+
+class _CircuitBreaker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+
+    def before_call(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < BREAKER_RESET_TIMEOUT:
+                raise CircuitBreakerError("CoreKinect API circuit is open")
+            # Half-open: restart the cooldown so only this call goes through
+            self._opened_at = time.monotonic()
+
+    def record(self, ok: bool):
+        with self._lock:
+            if ok:
+                self._failures = 0
+                self._opened_at = None
+                return
+            self._failures += 1
+            if self._failures >= BREAKER_FAIL_MAX:
+                if self._opened_at is None:
+                    logger.error("CoreKinect API failing, opening circuit for %ss", BREAKER_RESET_TIMEOUT)
+                self._opened_at = time.monotonic()
+
+
+_breaker = _CircuitBreaker()
+
+
+# Every HTTP call in this module goes through here.
+def _request(method: str, url: str, **kwargs) -> requests.Response:
+    _breaker.before_call()
+    try:
+        response = _session.request(method, url, **kwargs)
+    except requests.RequestException:
+        _breaker.record(False)
+        raise
+    _breaker.record(response.status_code < 500)
+    return response
+
+
+# While the circuit is open, public calls log and return an empty value of
+# their usual type rather than raising.
+def _fallback(empty):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                return fn(*args, **kwargs)
+            except CircuitBreakerError:
+                logger.error("%s() skipped: CoreKinect API circuit is open", fn.__name__)
+                return empty()
+        return wrapper
+    return decorator
+
+
+# The fallback only applies before anything was sent. A chunked batch that
+# fails partway (open circuit or request error) keeps what earlier chunks
+# already did on the server and returns it.
+_BATCH_ERRORS = (CircuitBreakerError, requests.RequestException)
+
+
+def _log_partial_batch(fn: str, sent: int, exc: Exception):
+    logger.error("%s() stopped after %d chunk(s): %s", fn, sent, str(exc) or type(exc).__name__)
+
+
+# Short-lived cache for the semi-static lookups, keyed by function name and
+# token. Calls that change account state clear it with invalidate_cache().
+CACHE_TTL = 30.0
+CACHE_MAXSIZE = 32
+_cache = {}
+_cache_lock = threading.Lock()
+_cache_generation = 0
+
+
+''' invalidate_cache
+    Drops every cached response
+'''
+def invalidate_cache():
+    global _cache_generation
+    with _cache_lock:
+        _cache.clear()
+        _cache_generation += 1
+
+
+# Callers get their own copy of a cached value, so mutating a result cannot
+# change what later callers see. A lookup that was in flight while the cache
+# was invalidated is returned but not stored.
+def _cached(fn):
+    @functools.wraps(fn)
+    def wrapper(token: str):
+        # Resolve the token once, so the key and the request always agree
+        # even if set_token() runs in between
+        token = token or _token
+        key = (fn.__name__, hash(token))
+        now = time.monotonic()
+        with _cache_lock:
+            hit = _cache.get(key)
+            generation = _cache_generation
+        if hit is not None and now - hit[0] < CACHE_TTL:
+            return copy.deepcopy(hit[1])
+        result = fn(token)
+        with _cache_lock:
+            if generation == _cache_generation:
+                if key not in _cache and len(_cache) >= CACHE_MAXSIZE:
+                    del _cache[min(_cache, key=lambda k: _cache[k][0])]
+                _cache[key] = (now, copy.deepcopy(result))
+        return result
+    return wrapper
+
+
+# Calls that change account state clear the cache however they exit, since
+# the server may have applied the change before an error was raised.
+def _invalidates(fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            invalidate_cache()
+    return wrapper
+
+
+# Batches are sent in fixed-size pieces so a transient failure only costs
+# (and retries) one piece, and each body stays under proxy size limits.
+BATCH_SIZE = 100
+
+
+def _chunks(seq, n=None):
+    n = n or BATCH_SIZE
+    for i in range(0, len(seq), n):
+        yield seq[i:i + n]
+
+
+# orjson is used when installed since the list endpoints can return large
+# bodies; otherwise this falls back to the stdlib decoder. Raises ValueError
+# on an empty or non-JSON body.
+def _loads(content: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+# Decodes a response body once; an empty or non-JSON body yields {}.
+def _json(response) -> Any:
+    try:
+        return _loads(response.content)
+    except ValueError:
+        return {}
+
+
+# Pulls one key out of each record for log lines, skipping anything that is
+# not a dict so an odd entry in the body cannot break the call.
+def _field(entries: List[Any], key: str) -> List[Any]:
+    return [entry.get(key) for entry in entries if isinstance(entry, dict)]
+
+
+# Shared response check for every call: HTTP errors raise, an empty body or
+# any of the required keys missing from it is logged against fn. A body that
+# is not of the expected container type (dict or list) comes back as empty().
+def _extract(response, required: Tuple[str, ...], fn: str, empty=dict) -> Any:
+    response.raise_for_status()
+    data = _json(response)
+    if not data:
+        logger.error("No json data received in %s()", fn)
+        return empty()
+    if not isinstance(data, empty):
+        logger.error("%s(): unexpected json response %s", fn, data)
+        return empty()
+    missing = [key for key in required if key not in data]
+    if missing:
+        logger.error("%s(): missing keys %s in json response", fn, missing)
+    return data
+
+
+# Yields the records of a list response one at a time. With ijson installed
+# the body is parsed incrementally off the socket, so memory stays flat and
+# callers can start on the first record before the last one arrives.
+# prefix is the ijson path of the records, key the equivalent dict key.
+# With or without ijson, a body that does not parse (empty, cut off partway,
+# or not JSON at all) raises requests.exceptions.InvalidJSONError rather than
+# passing for a short list. A connection dropped mid-stream counts as a
+# failure for the circuit breaker.
+def _iter_items(url: str, headers: Dict[str, str], prefix: str, key: str = None):
+    with _request('GET', url, headers=headers, stream=True) as response:
+        response.raise_for_status()
+        if ijson is not None:
+            response.raw.decode_content = True
+            try:
+                yield from ijson.items(response.raw, prefix, use_float=True)
+            except ijson.JSONError as exc:
+                raise requests.exceptions.InvalidJSONError(f"Invalid json data received from {url}") from exc
+            except urllib3.exceptions.HTTPError as exc:
+                _breaker.record(False)
+                raise requests.ConnectionError(exc) from exc
+            return
+        try:
+            content = response.content
+        except requests.RequestException:
+            _breaker.record(False)
+            raise
+        try:
+            data = _loads(content)
+        except ValueError as exc:
+            raise requests.exceptions.InvalidJSONError(f"Invalid json data received from {url}") from exc
+        if key is not None:
+            data = data.get(key, []) if isinstance(data, dict) else []
+        if isinstance(data, list):
+            yield from data
+
+
+# Generator counterpart of _fallback: an open circuit ends the iteration.
+def _iter_fallback(fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            yield from fn(*args, **kwargs)
+        except CircuitBreakerError:
+            logger.error("%s() skipped: CoreKinect API circuit is open", fn.__name__)
+    return wrapper
+
 
 ''' print_version
     Returns the version of CoreKinect being used 
 '''
+@_fallback(lambda: None)
 def print_version():
-    version = requests.get(base + '/account/GetVersion')
-    if not version:
-        logging.error("No json data received in print_version()")
-    logging.info('Requesting version...')
-    logging.info('Status code: {}'.format(version.status_code))
-    logging.info('Version: {}'.format(version.json()['Version']))
+    logger.info('Requesting version...')
+    data = _get_version(None)
+    logger.info('Version: %s', data.get('Version'))
+
+
+@_cached
+def _get_version(token: str) -> Dict[str, str]:
+    version = _request('GET', URL_GET_VERSION)
+    logger.info('Status code: %s', version.status_code)
+    return _extract(version, ("Version",), "print_version")
+
+
+# Tokens are reused until this many seconds before the server says they
+# expire, so a workflow requests one token rather than one per step.
+TOKEN_EXPIRY_MARGIN = 60.0
+_token_cache = {}
+_token_lock = threading.Lock()
+
+
+''' clear_token
+    Forgets cached access tokens, e.g. after a revocation or a 401, so the
+    next get_token() requests a fresh one. Clears every client if no
+    client_id is given
+'''
+def clear_token(client_id: str = None):
+    with _token_lock:
+        if client_id is None:
+            _token_cache.clear()
+            return
+        for key in [key for key in _token_cache if key[0] == client_id]:
+            del _token_cache[key]
 
 
 ''' get_token
     Returns an access token 
 '''
+@_fallback(str)
 def get_token(client_id: str, client_secret: str) -> str:
-    logging.info('Requesting token...')
-    auth_params = {
+    with _token_lock:
+        cached = _token_cache.get((client_id, client_secret))
+    if cached is not None and time.monotonic() < cached[1]:
+        return cached[0]
+    logger.info('Requesting token...')
+    auth_data = {
         'grant_type': 'client_credentials',
         'client_id': client_id,
-        'client_secret': client_secret,
-        'content-type': 'application/x-www-form-urlencoded'
+        'client_secret': client_secret
     }
-    authorize = requests.get(url=base + '/auth/RequestToken',
-                             params=auth_params,
-                             auth=('user', 'pass'))
-    if not authorize.json():
-        logging.error("No json data received in get_token()")
-    if "access_token" not in authorize.json():
-        logging.error("No token received")
-    logging.info('Status code: {}'.format(authorize.status_code))
-    logging.info('Token: {}'.format(authorize.json()["access_token"]))
-    return authorize.json()["access_token"]
+    authorize = _request('POST', URL_REQUEST_TOKEN,
+                         data=auth_data,
+                         headers={'Content-Type': 'application/x-www-form-urlencoded'},
+                         auth=('user', 'pass'))
+    data = _extract(authorize, ("access_token",), "get_token")
+    logger.info('Status code: %s', authorize.status_code)
+    token = data.get("access_token")
+    if not token:
+        return ""
+    logger.info('Token: %s', token)
+    if "expires_in" in data:
+        expires_at = time.monotonic() + float(data["expires_in"]) - TOKEN_EXPIRY_MARGIN
+        with _token_lock:
+            _token_cache[(client_id, client_secret)] = (token, expires_at)
+    return token
 
 
 # Id's are 16 character strings
@@ -46,119 +403,135 @@ def get_token(client_id: str, client_secret: str) -> str:
 ''' add_devices
     Returns a list of Devices that could not be added 
 '''
+@_fallback(list)
+@_invalidates
 def add_devices(new_ids: List[str], new_acs: List[str], token: str) -> List[str]:
-    logging.info('Adding devices...')
-    dev_code_pairs = {
-        "Authorization": 'Bearer {}'.format(token),
-        "devices": [{"DeviceId": new_ids[i], "ActivationCode": new_acs[i]} for i in range(len(new_ids))]
-    }
-    attempt_add = requests.post(base + '/account/AddDevices', params=dev_code_pairs)
-    if not attempt_add.json():
-        logging.error("No json data received in add_devices()")
-    if "DevicesPassed" not in attempt_add.json():
-        logging.error("Failed to add any devices")
-    passed = [id_dict["DeviceId"] for id_dict in attempt_add.json()["DevicesPassed"]]
-    logging.info("Added successfully: {}".format(passed))
+    logger.info('Adding devices...')
+    headers = _auth_headers(token)
+    passed = []
+    for sent, chunk in enumerate(_chunks(list(zip(new_ids, new_acs, strict=True)))):
+        dev_code_pairs = {
+            "devices": [{"DeviceId": dev_id, "ActivationCode": code} for dev_id, code in chunk]
+        }
+        try:
+            attempt_add = _request('POST', URL_ADD_DEVICES, json=dev_code_pairs, headers=headers)
+            data = _extract(attempt_add, ("DevicesPassed",), "add_devices")
+        except _BATCH_ERRORS as exc:
+            if not sent:
+                raise
+            _log_partial_batch("add_devices", sent, exc)
+            break
+        passed.extend(id_dict["DeviceId"] for id_dict in data.get("DevicesPassed", []))
+    logger.info("Added successfully: %s", passed)
     return passed
 
 
 ''' create_endpoint
     Returns a dictionary containing the ID and URL of the new endpoint 
 '''
+@_fallback(dict)
+@_invalidates
 def create_endpoint(token: str, devv_url: str) -> Dict[str, str]:
-    logging.info('Creating endpoint...')
-    endpoint = requests.post(base + '/account/CreateEndpoint', params={
-        "URL": devv_url,
-        "Authorization": 'Bearer {}'.format(token)
-    })
-
-    if not endpoint.json():
-        logging.error("No json data received in create_endpoint()")
-    if "EndpointId" not in endpoint.json():
-        logging.error("EndpointId is missing from json response in create_endpoint()")
-    logging.info('Endpoint ID: {}'.format(endpoint.json()["EndpointId"]))
-    return endpoint.json()
+    logger.info('Creating endpoint...')
+    endpoint = _request('POST', URL_CREATE_ENDPOINT, json={
+        "URL": devv_url
+    }, headers=_auth_headers(token))
+    data = _extract(endpoint, ("EndpointId",), "create_endpoint")
+    if "EndpointId" not in data:
+        return {}
+    logger.info('Endpoint ID: %s', data["EndpointId"])
+    return data
 
 
 #This feature is in Beta. Only supports the "client_credentials" grant type
 ''' create_oauth_endpoint
     Returns a dictionary containg the ID and URL of the new endpoint
 '''
+@_fallback(dict)
+@_invalidates
 def create_oauth_endpoint(devv_url: str, auth_url: str, token: str,
                           AuthTokenType: str = "Bearer", AuthTokenKey: str = "access_token") -> Dict[str, str]:
-    logging.info('Creating endpoint...')
-    endpoint = requests.post(base + '/account/CreateEndpoint', params={
+    logger.info('Creating endpoint...')
+    endpoint = _request('POST', URL_CREATE_ENDPOINT, json={
         "URL": devv_url,
         "AuthUrl": auth_url,
-        "Authorization": 'Bearer {}'.format(token),
         "AuthTokenType": AuthTokenType,
         "AuthTokenKey": AuthTokenKey,
-    })
-    if not endpoint.json():
-        logging.error("No json data received in create_endpoint()")
-    if "EndpointId" not in endpoint.json():
-        if "EndpointError" in endpoint.json():
-            logging.error("Failed to get a token from AuthUrl with given parameters, response from AuthUrl was 400")
-        else:
-            logging.error("EndpointId is missing from json response in create_oauth_endpoint()")
-    logging.info('Endpoint ID: {}'.format(endpoint.json()["EndpointId"]))
-    return endpoint.json()
+    }, headers=_auth_headers(token))
+    data = _extract(endpoint, ("EndpointId",), "create_oauth_endpoint")
+    if "EndpointError" in data:
+        logger.error("Failed to get a token from AuthUrl with given parameters, response from AuthUrl was 400")
+    if "EndpointId" not in data:
+        return {}
+    logger.info('Endpoint ID: %s', data["EndpointId"])
+    return data
 
 
 ''' assign_to_endpoint
     Returns a list of Devices that could not be assigned 
 '''
+@_fallback(list)
+@_invalidates
 def assign_to_endpoint(device_ids: List[str], endpoint_id: str, token: str) -> List[str]:
-    logging.info('Assigning devices to endpoint (ID: {})...'.format(endpoint_id))
-    dev_params = {'EndpointId': endpoint_id, 'Devices': [{"DeviceId": device_id} for device_id in device_ids]}
-    assign_device = requests.post(base + '/account/AssignDevicesToEndpoint',
-                                  headers={'Authorization': 'Bearer {}'.format(token)},
-                                  params=dev_params)
-
-    if not assign_device.json():
-        logging.error("No json data received in assign_to_endpoint()")
-    if "DevicePassed" not in assign_device.json():
-        logging.error("Failed to assign devices to endpoint")
-    passed = [id_dict["DeviceId"] for id_dict in assign_device.json()["DevicePassed"]]
-    logging.info('Successfully added: {}'.format(passed))
+    logger.info('Assigning devices to endpoint (ID: %s)...', endpoint_id)
+    headers = _auth_headers(token)
+    passed = []
+    for sent, chunk in enumerate(_chunks(device_ids)):
+        dev_params = {'EndpointId': endpoint_id, 'Devices': [{"DeviceId": device_id} for device_id in chunk]}
+        try:
+            assign_device = _request('POST', URL_ASSIGN_DEVICES_TO_ENDPOINT,
+                                     json=dev_params, headers=headers)
+            data = _extract(assign_device, ("DevicePassed",), "assign_to_endpoint")
+        except _BATCH_ERRORS as exc:
+            if not sent:
+                raise
+            _log_partial_batch("assign_to_endpoint", sent, exc)
+            break
+        passed.extend(id_dict["DeviceId"] for id_dict in data.get("DevicePassed", []))
+    logger.info('Successfully added: %s', passed)
     return passed
 
 
 ''' delete_from_endpoint
     Returns a list of the given devices that were not associated with the given endpoint 
 '''
+@_fallback(list)
+@_invalidates
 def delete_from_endpoint(device_ids: List[str], endpoint_id: str, token: str) -> List[str]:
-    print('Deleting devices from endpoint (ID: ' + endpoint_id + ')...')
-    dev_params = {'EndpointId': endpoint_id, 'Devices': [{"DeviceId": device_id} for device_id in device_ids]}
-    delete_device = requests.delete(base + '/account/DeleteDevicesFromEndpoint',
-                                    headers={'Authorization': 'Bearer {}'.format(token)},
-                                    params=dev_params)
-    if not delete_device.json():
-        logging.error("No json data received in delete_from_endpoint()")
-    if "DevicePassed" not in delete_device.json():
-        logging.error("Failed to delete (devices not found)")
-    passed = [id_dict["DeviceId"] for id_dict in delete_device.json()["DevicePassed"]]
-    logging.info("Deleted: {}".format(passed))
+    logger.info('Deleting devices from endpoint (ID: %s)...', endpoint_id)
+    headers = _auth_headers(token)
+    passed = []
+    for sent, chunk in enumerate(_chunks(device_ids)):
+        dev_params = {'EndpointId': endpoint_id, 'Devices': [{"DeviceId": device_id} for device_id in chunk]}
+        try:
+            delete_device = _request('DELETE', URL_DELETE_DEVICES_FROM_ENDPOINT,
+                                     json=dev_params, headers=headers)
+            data = _extract(delete_device, ("DevicePassed",), "delete_from_endpoint")
+        except _BATCH_ERRORS as exc:
+            if not sent:
+                raise
+            _log_partial_batch("delete_from_endpoint", sent, exc)
+            break
+        passed.extend(id_dict["DeviceId"] for id_dict in data.get("DevicePassed", []))
+    logger.info("Deleted: %s", passed)
     return passed
 
 
 ''' delete_endpoints
     Returns a list of the given endpoints that did not exist or were not found 
 '''
+@_fallback(list)
+@_invalidates
 def delete_endpoints(kill_points: List[str], token: str) -> List[str]:
-    logging.info('Deleting endpoints...')
+    logger.info('Deleting endpoints...')
     to_delete = {
         "Endpoints": [{"EndpointId": endpoint} for endpoint in kill_points]
     }
-    deleted_endpoints = requests.delete(base + '/account/DeleteEndpoints',
-                                        headers={'Authorization': 'Bearer ' + token},
-                                        params=to_delete)
-    if not deleted_endpoints.json():
-        logging.error("No json data received in delete_endpoints()")
-    if "EndpointsDeleted" not in deleted_endpoints.json():
-        logging.error("Endpoints not found")
-    deleted = [point_dict["EndpointId"] for point_dict in deleted_endpoints.json()["EndpointsDeleted"]]
-    logging.info("Deleted endpoints: {}".format(deleted))
+    deleted_endpoints = _request('DELETE', URL_DELETE_ENDPOINTS,
+                                 json=to_delete, headers=_auth_headers(token))
+    data = _extract(deleted_endpoints, ("EndpointsDeleted",), "delete_endpoints")
+    deleted = [point_dict["EndpointId"] for point_dict in data.get("EndpointsDeleted", [])]
+    logger.info("Deleted endpoints: %s", deleted)
     return deleted
 
 
@@ -166,67 +539,78 @@ def delete_endpoints(kill_points: List[str], token: str) -> List[str]:
     Returns a list of endpoints as dictionary elements containing keys 
         "EndpointId", "URL", "DataType" 
 '''
+@_fallback(list)
+@_cached
 def get_endpoints(token: str) -> List[Dict[str, str]]:
-    logging.info('Requesting list of endpoints...')
-    endpoints = requests.get(base + '/account/GetEndpoints/',
-                             headers={'Authorization': 'Bearer {}'.format(token)})
+    logger.info('Requesting list of endpoints...')
+    entries = list(_iter_items(URL_GET_ENDPOINTS, _auth_headers(token), 'Endpoints.item', 'Endpoints'))
+    if not entries:
+        logger.error("No endpoints received in get_endpoints()")
+    if logger.isEnabledFor(logging.INFO):
+        logger.info('Found %d endpoints: %s', len(entries), _field(entries, "EndpointId"))
+    return entries
 
-    if not endpoints.json():
-        logging.error("No json data received in get_endpoints()")
-    if "EndpointId" not in endpoints.json():
-        logging.error("Endpoints are missing from json response in get_endpoints()")
-    for entry in endpoints.json()["Endpoints"]:
-        logging.info('Found: {}'.format(entry.values()))
-    return endpoints.json()["Endpoints"]
+
+''' iter_endpoints
+    Yields endpoints one at a time as they are parsed, see get_endpoints
+'''
+@_iter_fallback
+def iter_endpoints(token: str) -> Iterator[Dict[str, str]]:
+    yield from _iter_items(URL_GET_ENDPOINTS, _auth_headers(token), 'Endpoints.item', 'Endpoints')
 
 
 ''' get_devices
     Returns a list of devices as dictionary elements with keys 
         "DeviceId", "DeviceType", "Endpoints" 
 '''
+@_fallback(list)
 def get_devices(token: str) -> List[Dict[str, Any]]:
-    logging.info('Requesting list of devices...')
-    devices = requests.get(base + '/account/GetDevices/',
-                           headers={'Authorization': 'Bearer {}'.format(token)})
+    logger.info('Requesting list of devices...')
+    devices = list(_iter_items(URL_GET_DEVICES, _auth_headers(token), 'Devices.item', 'Devices'))
     if not devices:
-        logging.error("No json data received in get_devices()")
-    if "Devices" not in devices:
-        logging.error("No devices found")
-    found = [entry["DeviceId"] for entry in devices["Devices"]]
-    logging.info("Found devices: {}".format(found))
-    return devices.json()["Devices"]
+        logger.error("No devices found")
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Found devices: %s", _field(devices, "DeviceId"))
+    return devices
+
+
+''' iter_devices
+    Yields devices one at a time as they are parsed, see get_devices
+'''
+@_iter_fallback
+def iter_devices(token: str) -> Iterator[Dict[str, Any]]:
+    yield from _iter_items(URL_GET_DEVICES, _auth_headers(token), 'Devices.item', 'Devices')
 
 
 ''' get_devices_by_location
     Returns a list of locations as dictionary elements with keys
         "LocationName", "DeviceType", "Devices" 
 '''
+@_fallback(list)
 def get_devices_by_location(token: str) -> List[Dict[str, Any]]:
-    logging.info('Requesting device list by location...')
-    devices = requests.get(base + '/account/GetDevicesByLocation/',
-                           headers={'Authorization': 'Bearer {}'.format(token)})
-
-    if not devices:
-        logging.error("No json data received in get_devices_by_location()")
-    if "Devices" not in devices:
-        logging.error("No devices found")
-    logging.info("Locations found: {}".format([entry["LocationName"] for entry in devices]))
-    return devices.json()
+    logger.info('Requesting device list by location...')
+    devices = _request('GET', URL_GET_DEVICES_BY_LOCATION, headers=_auth_headers(token))
+    data = _extract(devices, (), "get_devices_by_location", empty=list)
+    if data and not any(isinstance(entry, dict) and entry.get("Devices") for entry in data):
+        logger.error("No devices found")
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Locations found: %s", _field(data, "LocationName"))
+    return data
 
 
 ''' get_locations
     Returns a list of locations as dictionary elements with keys:
         "LocationName", "Lattitude", "Longitude" 
 '''
+@_fallback(list)
+@_cached
 def get_locations(token: str) -> List[Dict[str, Any]]:
-    logging.info('Requesting location list...')
-    locations = requests.get(base + '/account/GetLocations/',
-                             headers={'Authorization': 'Bearer {}'.format(token)})
-
-    if not locations:
-        logging.error("No json data received in get_locations()")
-    logging.info("Locations found: {}".format([entry["LocationName"] for entry in locations]))
-    return locations.json()
+    logger.info('Requesting location list...')
+    locations = _request('GET', URL_GET_LOCATIONS, headers=_auth_headers(token))
+    data = _extract(locations, (), "get_locations", empty=list)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Locations found: %s", _field(data, "LocationName"))
+    return data
 
 
 ''' get_location_reports
@@ -242,14 +626,103 @@ def get_locations(token: str) -> List[Dict[str, Any]]:
             "AccuracyOverall"
         }           
 '''
+@_fallback(list)
+@_cached
 def get_location_reports(token: str) -> List[Dict[str, Any]]:
-    logging.info('Requesting location reports...')
-    reports = requests.get(base + '/account/GetLocationReports',
-                           headers={'Authorization': 'Bearer {}'.format(token)})
+    logger.info('Requesting location reports...')
+    reports = list(_iter_items(URL_GET_LOCATION_REPORTS, _auth_headers(token), 'item'))
     if not reports:
-        logging.error("No json data received in get_location_reports")
-    logging.info("Reports generated for: {}".format([entry["LocationName"] for entry in reports]))
-    return reports.json()
+        logger.error("No json data received in get_location_reports")
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Reports generated for: %s", _field(reports, "LocationName"))
+    return reports
+
+
+''' iter_location_reports
+    Yields location reports one at a time as they are parsed, see get_location_reports
+'''
+@_iter_fallback
+def iter_location_reports(token: str) -> Iterator[Dict[str, Any]]:
+    yield from _iter_items(URL_GET_LOCATION_REPORTS, _auth_headers(token), 'item')
+
+
+''' get_overview
+    Fetches devices, endpoints, locations and location reports concurrently.
+    Returns a dictionary with keys
+        "devices", "endpoints", "locations", "reports"
+'''
+def get_overview(token: str) -> Dict[str, List[Dict[str, Any]]]:
+    lookups = [('devices', get_devices), ('endpoints', get_endpoints),
+               ('locations', get_locations), ('reports', get_location_reports)]
+    with ThreadPoolExecutor(max_workers=len(lookups)) as pool:
+        futures = {name: pool.submit(fn, token) for name, fn in lookups}
+        return {name: future.result() for name, future in futures.items()}
+
+
+# Async siblings of the batch calls. Each runs its blocking counterpart on a
+# worker thread so independent calls overlap while still sharing the pooled
+# session, retry policy and timeouts above. Large batches are split into
+# chunks which are sent concurrently, at most POOL_MAXSIZE at a time so every
+# chunk finds a kept-alive connection instead of overflowing the pool.
+# Chunks that fail with a request error or open circuit are logged and the
+# rest merged; if none succeed the first error is raised, as the sync call
+# would. Any other exception is raised as is.
+async def _gather_chunks(send, seq) -> List[str]:
+    limit = asyncio.Semaphore(POOL_MAXSIZE)
+
+    async def run(chunk):
+        async with limit:
+            return await asyncio.to_thread(send, chunk)
+
+    results = await asyncio.gather(*(run(chunk) for chunk in _chunks(seq)), return_exceptions=True)
+    errors = [result for result in results if isinstance(result, BaseException)]
+    for exc in errors:
+        if not isinstance(exc, _BATCH_ERRORS):
+            raise exc
+    if errors and len(errors) == len(results):
+        raise errors[0]
+    for exc in errors:
+        logger.error("Batch chunk failed: %s", str(exc) or type(exc).__name__)
+    return [dev_id for result in results if not isinstance(result, BaseException) for dev_id in result]
+
+
+async def aadd_devices(new_ids: List[str], new_acs: List[str], token: str) -> List[str]:
+    pairs = list(zip(new_ids, new_acs, strict=True))
+    return await _gather_chunks(lambda chunk: add_devices([dev_id for dev_id, _ in chunk],
+                                                          [code for _, code in chunk], token), pairs)
+
+
+async def acreate_endpoint(token: str, devv_url: str) -> Dict[str, str]:
+    return await asyncio.to_thread(create_endpoint, token, devv_url)
+
+
+async def aassign_to_endpoint(device_ids: List[str], endpoint_id: str, token: str) -> List[str]:
+    return await _gather_chunks(lambda chunk: assign_to_endpoint(chunk, endpoint_id, token), device_ids)
+
+
+async def adelete_from_endpoint(device_ids: List[str], endpoint_id: str, token: str) -> List[str]:
+    return await _gather_chunks(lambda chunk: delete_from_endpoint(chunk, endpoint_id, token), device_ids)
+
+
+async def adelete_endpoints(kill_points: List[str], token: str) -> List[str]:
+    return await asyncio.to_thread(delete_endpoints, kill_points, token)
+
+
+''' bulk_provision
+    Adds the given devices and creates an endpoint concurrently, then assigns
+    the added devices to it. Returns a dictionary with keys
+        "Endpoint", "DevicesPassed"
+'''
+async def bulk_provision(new_ids: List[str], new_acs: List[str], devv_url: str, token: str) -> Dict[str, Any]:
+    added, endpoint = await asyncio.gather(aadd_devices(new_ids, new_acs, token),
+                                           acreate_endpoint(token, devv_url))
+    if "EndpointId" not in endpoint:
+        logger.error("bulk_provision(): no endpoint created, %d added devices left unassigned", len(added))
+        return {"Endpoint": endpoint, "DevicesPassed": []}
+    assigned = await aassign_to_endpoint(added, endpoint["EndpointId"], token)
+    return {"Endpoint": endpoint, "DevicesPassed": assigned}
+
 
 if __name__ == '__main__':
+    logging.basicConfig(format='%(message)s', level=logging.DEBUG)
     print_version()
@@ -0,0 +1,593 @@
+#!/usr/bin/env python3
+
+# Tests for corekinect.py. Requests are answered by a fake HTTPAdapter
+# mounted on the module session, so nothing goes over the network.
+
+import asyncio
+import http.server
+import io
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+import requests
+import urllib3
+from requests.adapters import BaseAdapter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", ".."))
+import corekinect as ck
+
+
+class FakeAdapter(BaseAdapter):
+    # handler(request) returns (status, body); body is JSON-encoded unless bytes
+    def __init__(self, handler):
+        super().__init__()
+        self.handler = handler
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        with self.lock:
+            self.requests.append(request)
+        status, body = self.handler(request)
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        response = requests.Response()
+        response.status_code = status
+        response.raw = io.BytesIO(body)
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+class CoreKinectTest(unittest.TestCase):
+    def setUp(self):
+        self.orig_adapter = ck._session.get_adapter('https://')
+        self.orig_settings = (ck.BREAKER_FAIL_MAX, ck.BREAKER_RESET_TIMEOUT, ck.CACHE_TTL, ck.ijson)
+        ck._breaker = ck._CircuitBreaker()
+        ck.invalidate_cache()
+        ck.clear_token()
+        ck._token = None
+        ck._session.headers.pop('Authorization', None)
+
+    def tearDown(self):
+        ck._session.mount('https://', self.orig_adapter)
+        ck.BREAKER_FAIL_MAX, ck.BREAKER_RESET_TIMEOUT, ck.CACHE_TTL, ck.ijson = self.orig_settings
+
+    def mount(self, handler):
+        adapter = FakeAdapter(handler)
+        ck._session.mount('https://', adapter)
+        return adapter
+
+
+class BreakerTest(CoreKinectTest):
+    def test_opens_after_consecutive_failures(self):
+        adapter = self.mount(lambda r: (503, {}))
+        for _ in range(ck.BREAKER_FAIL_MAX):
+            with self.assertRaises(requests.HTTPError):
+                ck.get_locations("t")
+        self.assertEqual(ck.get_locations("t"), [])
+        self.assertEqual(len(adapter.requests), ck.BREAKER_FAIL_MAX)
+
+    def test_half_open_trial_and_reset(self):
+        ck.BREAKER_FAIL_MAX = 1
+        ck.BREAKER_RESET_TIMEOUT = 0.05
+        status = [500]
+        adapter = self.mount(lambda r: (status[0], [{"LocationName": "x"}]))
+        with self.assertRaises(requests.HTTPError):
+            ck.get_devices_by_location("t")
+        self.assertEqual(ck.get_devices_by_location("t"), [])
+        self.assertEqual(len(adapter.requests), 1)
+
+        # A failing trial reopens the circuit
+        time.sleep(0.06)
+        with self.assertRaises(requests.HTTPError):
+            ck.get_devices_by_location("t")
+        self.assertEqual(ck.get_devices_by_location("t"), [])
+        self.assertEqual(len(adapter.requests), 2)
+
+        # A successful trial closes it again
+        time.sleep(0.06)
+        status[0] = 200
+        self.assertEqual(ck.get_devices_by_location("t"), [{"LocationName": "x"}])
+        self.assertEqual(ck.get_devices_by_location("t"), [{"LocationName": "x"}])
+        self.assertEqual(len(adapter.requests), 4)
+
+    def test_iter_functions_fall_back_when_open(self):
+        ck.BREAKER_FAIL_MAX = 1
+        adapter = self.mount(lambda r: (500, {}))
+        with self.assertRaises(requests.HTTPError):
+            ck.get_devices("t")
+        self.assertEqual(list(ck.iter_devices("t")), [])
+        self.assertEqual(list(ck.iter_endpoints("t")), [])
+        self.assertEqual(len(adapter.requests), 1)
+
+
+class BreakerBatchTest(CoreKinectTest):
+    def test_partial_result_when_circuit_opens_mid_batch(self):
+        def handler(request):
+            devices = json.loads(request.body)["devices"]
+            return 200, {"DevicesPassed": [{"DeviceId": d["DeviceId"]} for d in devices]}
+        adapter = self.mount(handler)
+        ids = [f"id{i}" for i in range(300)]
+        acs = [f"ac{i}" for i in range(300)]
+        before_call = ck._breaker.before_call
+        calls = []
+
+        def open_after_first():
+            calls.append(1)
+            if len(calls) > 1:
+                raise ck.CircuitBreakerError()
+            before_call()
+
+        with mock.patch.object(ck._breaker, 'before_call', side_effect=open_after_first):
+            passed = ck.add_devices(ids, acs, "t")
+        self.assertEqual(passed, ids[:ck.BATCH_SIZE])
+        self.assertEqual(len(adapter.requests), 1)
+
+    def test_fallback_when_open_before_first_chunk(self):
+        adapter = self.mount(lambda r: (200, {"DevicePassed": []}))
+        with mock.patch.object(ck._breaker, 'before_call', side_effect=ck.CircuitBreakerError()):
+            self.assertEqual(ck.assign_to_endpoint(["a"], "e", "t"), [])
+        self.assertEqual(adapter.requests, [])
+
+
+class TokenHeaderTest(CoreKinectTest):
+    def test_concurrent_callers_send_their_own_token(self):
+        adapter = self.mount(lambda r: (200, [{"LocationName": r.headers.get("Authorization")}]))
+        results = {}
+
+        def fetch(token):
+            results[token] = ck.get_devices_by_location(token)
+
+        threads = [threading.Thread(target=fetch, args=(t,)) for t in ("A", "B")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results["A"], [{"LocationName": "Bearer A"}])
+        self.assertEqual(results["B"], [{"LocationName": "Bearer B"}])
+        self.assertNotIn('Authorization', ck._session.headers)
+        self.assertEqual(len(adapter.requests), 2)
+
+    def test_set_token_is_used_by_default(self):
+        adapter = self.mount(lambda r: (200, []))
+        ck.set_token("S")
+        ck.get_devices_by_location(None)
+        ck.get_devices_by_location("")
+        self.assertEqual([r.headers["Authorization"] for r in adapter.requests], ["Bearer S", "Bearer S"])
+
+    def test_empty_token_sends_no_header(self):
+        adapter = self.mount(lambda r: (200, []))
+        ck.get_devices_by_location("")
+        self.assertNotIn("Authorization", adapter.requests[0].headers)
+
+
+class RetryTest(CoreKinectTest):
+    # The retry policy lives in urllib3, below any adapter the other tests
+    # can fake, so these run against a local plain-HTTP server instead.
+    def serve(self, statuses):
+        hits = []
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                hits.append(self.path)
+                self.send_response(statuses[min(len(hits), len(statuses)) - 1])
+                self.send_header('Content-Length', '2')
+                self.end_headers()
+                self.wfile.write(b'{}')
+
+            def log_message(self, *args):
+                pass
+
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        ck._session.mount('http://', ck._TimeoutAdapter(max_retries=ck._retry))
+        self.addCleanup(ck._session.mount, 'http://', requests.adapters.HTTPAdapter())
+        return f"http://127.0.0.1:{server.server_address[1]}/", hits
+
+    def test_transient_error_is_retried(self):
+        url, hits = self.serve([503, 200])
+        self.assertEqual(ck._request('GET', url).status_code, 200)
+        self.assertEqual(len(hits), 2)
+
+    def test_auth_error_is_not_retried(self):
+        for status in (401, 403):
+            url, hits = self.serve([status, 200])
+            self.assertEqual(ck._request('GET', url).status_code, status)
+            self.assertEqual(len(hits), 1)
+
+
+class TimeoutTest(unittest.TestCase):
+    def send_timeout(self, **kwargs):
+        request = requests.Request('GET', 'https://example.invalid/').prepare()
+        with mock.patch.object(requests.adapters.HTTPAdapter, 'send') as send:
+            ck._TimeoutAdapter().send(request, **kwargs)
+        return send.call_args.kwargs['timeout']
+
+    def test_default_timeout_injected(self):
+        self.assertEqual(self.send_timeout(), (ck.CONNECT_TIMEOUT, ck.READ_TIMEOUT))
+
+    def test_default_timeout_read_at_send_time(self):
+        with mock.patch.object(ck, 'READ_TIMEOUT', 1.5):
+            self.assertEqual(self.send_timeout(), (ck.CONNECT_TIMEOUT, 1.5))
+
+    def test_explicit_timeout_kept(self):
+        self.assertEqual(self.send_timeout(timeout=7), 7)
+
+
+def provision_handler(create_status=200):
+    def handler(request):
+        body = json.loads(request.body)
+        if request.url == ck.URL_ADD_DEVICES:
+            return 200, {"DevicesPassed": [{"DeviceId": d["DeviceId"]} for d in body["devices"]]}
+        if request.url == ck.URL_CREATE_ENDPOINT:
+            return create_status, {"EndpointId": "e1", "URL": body["URL"]}
+        return 200, {"DevicePassed": [{"DeviceId": d["DeviceId"]} for d in body["Devices"]]}
+    return handler
+
+
+class AsyncTest(CoreKinectTest):
+    def test_async_variants(self):
+        self.mount(provision_handler())
+        self.assertEqual(asyncio.run(ck.acreate_endpoint("t", "u")), {"EndpointId": "e1", "URL": "u"})
+        self.assertEqual(asyncio.run(ck.aassign_to_endpoint(["a", "b"], "e1", "t")), ["a", "b"])
+
+    def test_bulk_provision(self):
+        adapter = self.mount(provision_handler())
+        result = asyncio.run(ck.bulk_provision(["a", "b"], ["x", "y"], "u", "t"))
+        self.assertEqual(result, {"Endpoint": {"EndpointId": "e1", "URL": "u"}, "DevicesPassed": ["a", "b"]})
+        self.assertEqual(adapter.requests[-1].url, ck.URL_ASSIGN_DEVICES_TO_ENDPOINT)
+        self.assertEqual(json.loads(adapter.requests[-1].body)["EndpointId"], "e1")
+
+    def test_bulk_provision_without_endpoint(self):
+        adapter = self.mount(provision_handler())
+        # create_endpoint's fallback while the circuit is open
+        with mock.patch.object(ck, 'create_endpoint', return_value={}):
+            result = asyncio.run(ck.bulk_provision(["a"], ["x"], "u", "t"))
+        self.assertEqual(result, {"Endpoint": {}, "DevicesPassed": []})
+        self.assertNotIn(ck.URL_ASSIGN_DEVICES_TO_ENDPOINT, [r.url for r in adapter.requests])
+
+
+class ChunkTest(CoreKinectTest):
+    def assign_handler(self, fail_chunks=()):
+        def handler(request):
+            devices = json.loads(request.body)["Devices"]
+            if devices[0]["DeviceId"] // ck.BATCH_SIZE in fail_chunks:
+                return 400, {}
+            return 200, {"DevicePassed": [{"DeviceId": d["DeviceId"]} for d in devices]}
+        return handler
+
+    def test_batches_are_chunked_and_merged(self):
+        adapter = self.mount(self.assign_handler())
+        ids = list(range(250))
+        self.assertEqual(ck.assign_to_endpoint(ids, "e", "t"), ids)
+        self.assertEqual([len(json.loads(r.body)["Devices"]) for r in adapter.requests], [100, 100, 50])
+
+    def test_async_chunks_are_merged(self):
+        adapter = self.mount(self.assign_handler())
+        ids = list(range(250))
+        self.assertEqual(asyncio.run(ck.aassign_to_endpoint(ids, "e", "t")), ids)
+        self.assertEqual(len(adapter.requests), 3)
+
+    def test_request_error_keeps_earlier_chunks(self):
+        adapter = self.mount(self.assign_handler(fail_chunks=(1,)))
+        ids = list(range(300))
+        self.assertEqual(ck.delete_from_endpoint(ids, "e", "t"), ids[:100])
+        self.assertEqual(len(adapter.requests), 2)
+
+    def test_request_error_on_first_chunk_raises(self):
+        self.mount(self.assign_handler(fail_chunks=(0,)))
+        with self.assertRaises(requests.HTTPError):
+            ck.assign_to_endpoint(list(range(300)), "e", "t")
+
+    def test_async_merges_successful_chunks(self):
+        self.mount(self.assign_handler(fail_chunks=(1,)))
+        ids = list(range(300))
+        self.assertEqual(asyncio.run(ck.aassign_to_endpoint(ids, "e", "t")), ids[:100] + ids[200:])
+
+    def test_async_raises_when_every_chunk_fails(self):
+        self.mount(self.assign_handler(fail_chunks=(0, 1)))
+        with self.assertRaises(requests.HTTPError):
+            asyncio.run(ck.adelete_from_endpoint(list(range(200)), "e", "t"))
+
+
+class ResponseShapeTest(CoreKinectTest):
+    def test_non_dict_entries(self):
+        self.mount(lambda r: (200, ["x"]))
+        self.assertEqual(ck.get_devices_by_location("t"), ["x"])
+        self.assertEqual(ck.get_locations("t"), ["x"])
+        self.assertEqual(ck.get_devices("t"), [])
+
+    def test_response_decoded_once(self):
+        self.mount(lambda r: (200, {"EndpointId": "e1"}))
+        with mock.patch.object(ck, '_json', wraps=ck._json) as decode:
+            ck.create_endpoint("t", "u")
+        self.assertEqual(decode.call_count, 1)
+
+
+class JsonBodyTest(CoreKinectTest):
+    def test_payloads_sent_as_json_bodies(self):
+        adapter = self.mount(lambda r: (200, {"DevicesPassed": [], "EndpointId": "e1", "EndpointsDeleted": []}))
+        ck.add_devices(["a"], ["x"], "t")
+        ck.create_endpoint("t", "u")
+        ck.delete_endpoints(["e1"], "t")
+        for request in adapter.requests:
+            self.assertEqual(request.headers["Content-Type"], "application/json")
+            self.assertNotIn("?", request.url)
+        self.assertEqual([json.loads(r.body) for r in adapter.requests], [
+            {"devices": [{"DeviceId": "a", "ActivationCode": "x"}]},
+            {"URL": "u"},
+            {"Endpoints": [{"EndpointId": "e1"}]},
+        ])
+
+
+class DecodeTest(CoreKinectTest):
+    def response(self, body):
+        response = requests.Response()
+        response._content = body
+        return response
+
+    def test_orjson_used_when_available(self):
+        fake = mock.Mock(loads=mock.Mock(return_value={"a": 1}))
+        with mock.patch.object(ck, 'orjson', fake):
+            self.assertEqual(ck._json(self.response(b'{"a": 1}')), {"a": 1})
+        fake.loads.assert_called_once_with(b'{"a": 1}')
+
+    def test_stdlib_fallback(self):
+        with mock.patch.object(ck, 'orjson', None):
+            self.assertEqual(ck._json(self.response(b'{"a": 1}')), {"a": 1})
+            self.assertEqual(ck._json(self.response(b'')), {})
+
+    @unittest.skipIf(ck.orjson is None, "orjson not installed")
+    def test_orjson_invalid_body(self):
+        self.assertEqual(ck._json(self.response(b'<html>')), {})
+
+
+class CacheTest(CoreKinectTest):
+    def test_hit_and_expiry(self):
+        ck.CACHE_TTL = 0.05
+        adapter = self.mount(lambda r: (200, [{"LocationName": "x"}]))
+        self.assertEqual(ck.get_locations("t"), [{"LocationName": "x"}])
+        self.assertEqual(ck.get_locations("t"), [{"LocationName": "x"}])
+        self.assertEqual(len(adapter.requests), 1)
+        time.sleep(0.06)
+        ck.get_locations("t")
+        self.assertEqual(len(adapter.requests), 2)
+
+    def test_result_is_a_copy(self):
+        self.mount(lambda r: (200, [{"LocationName": "x"}]))
+        ck.get_locations("t").append({"LocationName": "bogus"})
+        ck.get_locations("t")[0]["LocationName"] = "bogus"
+        self.assertEqual(ck.get_locations("t"), [{"LocationName": "x"}])
+
+    def test_mutation_invalidates_even_on_error(self):
+        def handler(request):
+            if request.method == 'GET':
+                return 200, [{"LocationName": "x"}]
+            return 500, {}
+        adapter = self.mount(handler)
+        ck.get_locations("t")
+        with self.assertRaises(requests.HTTPError):
+            ck.create_endpoint("t", "https://example.com")
+        ck.get_locations("t")
+        self.assertEqual([r.method for r in adapter.requests], ['GET', 'POST', 'GET'])
+
+    def test_in_flight_lookup_not_stored_after_invalidation(self):
+        def handler(request):
+            ck.invalidate_cache()
+            return 200, [{"LocationName": "x"}]
+        adapter = self.mount(handler)
+        ck.get_locations("t")
+        ck.get_locations("t")
+        self.assertEqual(len(adapter.requests), 2)
+
+    def test_keyed_on_token_sent(self):
+        adapter = self.mount(lambda r: (200, [{"LocationName": r.headers["Authorization"]}]))
+        self.assertEqual(ck.get_locations("A"), [{"LocationName": "Bearer A"}])
+        self.assertEqual(ck.get_locations("B"), [{"LocationName": "Bearer B"}])
+        ck.set_token("A")
+        self.assertEqual(ck.get_locations(None), [{"LocationName": "Bearer A"}])
+        self.assertEqual(len(adapter.requests), 2)
+
+    def test_key_and_request_use_the_same_token(self):
+        def handler(request):
+            return 200, [{"LocationName": request.headers["Authorization"]}]
+        self.mount(handler)
+        ck.set_token("A")
+        real_auth_headers = ck._auth_headers
+
+        def switch_token(token):
+            ck.set_token("B")
+            return real_auth_headers(token)
+
+        with mock.patch.object(ck, '_auth_headers', side_effect=switch_token):
+            self.assertEqual(ck.get_locations(None), [{"LocationName": "Bearer A"}])
+        ck.set_token("A")
+        self.assertEqual(ck.get_locations(None), [{"LocationName": "Bearer A"}])
+
+    def test_signature_unchanged(self):
+        with self.assertRaises(TypeError):
+            ck.get_locations()
+
+
+class StreamTest(CoreKinectTest):
+    # Each test runs with ijson (when installed) and without it
+    def parsers(self):
+        if self.orig_settings[3] is not None:
+            yield self.orig_settings[3]
+        yield None
+
+    def test_records_streamed(self):
+        body = {"Devices": [{"DeviceId": "a"}, {"DeviceId": "b", "Accuracy": 0.5}]}
+        self.mount(lambda r: (200, body))
+        for parser in self.parsers():
+            ck.ijson = parser
+            self.assertEqual(list(ck.iter_devices("t")), body["Devices"])
+            self.assertEqual(ck.get_devices("t"), body["Devices"])
+
+    def test_invalid_bodies_raise(self):
+        full = json.dumps({"Endpoints": [{"EndpointId": "e1"}, {"EndpointId": "e2"}, {"EndpointId": "e3"}]})
+        for body in (full[:-20].encode(), b'<html>Bad Gateway</html>', b''):
+            self.mount(lambda r: (200, body))
+            for parser in self.parsers():
+                ck.ijson = parser
+                with self.assertRaises(requests.exceptions.InvalidJSONError):
+                    ck.get_endpoints("t")
+                with self.assertRaises(requests.exceptions.InvalidJSONError):
+                    list(ck.iter_endpoints("t"))
+
+    def test_error_object_yields_nothing(self):
+        self.mount(lambda r: (200, {"Error": "x"}))
+        for parser in self.parsers():
+            ck.ijson = parser
+            self.assertEqual(ck.get_location_reports("t"), [])
+            self.assertEqual(ck.get_devices("t"), [])
+
+    def test_dropped_stream_counts_for_breaker(self):
+        ck.BREAKER_FAIL_MAX = 1
+
+        class DroppingRaw(io.BytesIO):
+            def read(self, *args):
+                raise urllib3.exceptions.ProtocolError("connection dropped")
+
+        def send(request, **kwargs):
+            response = requests.Response()
+            response.status_code = 200
+            response.raw = urllib3.HTTPResponse(body=DroppingRaw(), preload_content=False)
+            response.request = request
+            return response
+
+        adapter = self.mount(lambda r: (200, {}))
+        adapter.send = send
+        for parser in self.parsers():
+            ck._breaker = ck._CircuitBreaker()
+            ck.ijson = parser
+            with self.assertRaises(requests.RequestException):
+                ck.get_devices("t")
+            self.assertEqual(ck.get_devices("t"), [])
+
+
+class TokenTest(CoreKinectTest):
+    def test_secret_sent_in_form_body(self):
+        adapter = self.mount(lambda r: (200, {"access_token": "tok", "expires_in": 3600}))
+        self.assertEqual(ck.get_token("id", "s3cret"), "tok")
+        request = adapter.requests[0]
+        self.assertEqual(request.method, "POST")
+        self.assertNotIn("s3cret", request.url)
+        self.assertIn("client_secret=s3cret", request.body)
+        self.assertEqual(request.headers["Content-Type"], "application/x-www-form-urlencoded")
+
+    def test_token_reused_until_expiry(self):
+        adapter = self.mount(lambda r: (200, {"access_token": "tok", "expires_in": 3600}))
+        self.assertEqual(ck.get_token("id", "s"), "tok")
+        self.assertEqual(ck.get_token("id", "s"), "tok")
+        self.assertEqual(len(adapter.requests), 1)
+        with mock.patch.object(ck.time, "monotonic", return_value=time.monotonic() + 3600):
+            ck.get_token("id", "s")
+        self.assertEqual(len(adapter.requests), 2)
+
+    def test_short_lived_token_not_cached(self):
+        adapter = self.mount(lambda r: (200, {"access_token": "tok", "expires_in": ck.TOKEN_EXPIRY_MARGIN}))
+        ck.get_token("id", "s")
+        ck.get_token("id", "s")
+        self.assertEqual(len(adapter.requests), 2)
+
+    def test_no_expiry_not_cached(self):
+        adapter = self.mount(lambda r: (200, {"access_token": "tok"}))
+        ck.get_token("id", "s")
+        ck.get_token("id", "s")
+        self.assertEqual(len(adapter.requests), 2)
+
+    def test_clear_token(self):
+        adapter = self.mount(lambda r: (200, {"access_token": "tok", "expires_in": 3600}))
+        ck.get_token("a", "s")
+        ck.get_token("b", "s")
+        ck.clear_token("a")
+        ck.get_token("a", "s")
+        ck.get_token("b", "s")
+        self.assertEqual(len(adapter.requests), 3)
+        ck.clear_token()
+        ck.get_token("b", "s")
+        self.assertEqual(len(adapter.requests), 4)
+
+
+class PairingTest(CoreKinectTest):
+    def test_mismatched_lengths_rejected(self):
+        adapter = self.mount(lambda r: (200, {"DevicesPassed": []}))
+        with self.assertRaises(ValueError):
+            ck.add_devices(["a", "b"], ["x"], "t")
+        with self.assertRaises(ValueError):
+            asyncio.run(ck.aadd_devices(["a"], ["x", "y"], "t"))
+        self.assertEqual(adapter.requests, [])
+
+
+class EmptyBodyTest(CoreKinectTest):
+    def test_empty_bodies_give_empty_results(self):
+        for body in (b'', {}):
+            self.mount(lambda r: (200, body))
+            ck.invalidate_cache()
+            ck.clear_token()
+            ck.print_version()
+            self.assertEqual(ck.get_token("id", "s"), "")
+            self.assertEqual(ck.add_devices(["a"], ["x"], "t"), [])
+            self.assertEqual(ck.create_endpoint("t", "https://example.com"), {})
+            self.assertEqual(ck.create_oauth_endpoint("https://example.com", "https://auth", "t"), {})
+            self.assertEqual(ck.assign_to_endpoint(["a"], "e1", "t"), [])
+            self.assertEqual(ck.delete_from_endpoint(["a"], "e1", "t"), [])
+            self.assertEqual(ck.delete_endpoints(["e1"], "t"), [])
+            self.assertEqual(ck.get_locations("t"), [])
+
+    def test_error_object_gives_empty_list(self):
+        self.mount(lambda r: (200, {"Error": "Unauthorized"}))
+        self.assertEqual(ck.get_locations("t"), [])
+        self.assertEqual(ck.delete_endpoints(["e1"], "t"), [])
+
+    def test_endpoint_error_without_id(self):
+        self.mount(lambda r: (200, {"EndpointError": "AuthUrl returned 400"}))
+        self.assertEqual(ck.create_oauth_endpoint("https://example.com", "https://auth", "t"), {})
+
+
+class OverviewTest(CoreKinectTest):
+    bodies = {
+        ck.URL_GET_DEVICES: {"Devices": [{"DeviceId": "d1"}]},
+        ck.URL_GET_ENDPOINTS: {"Endpoints": [{"EndpointId": "e1"}]},
+        ck.URL_GET_LOCATIONS: [{"LocationName": "Dock"}],
+        ck.URL_GET_LOCATION_REPORTS: [{"LocationName": "Dock", "DeviceCount": 1}],
+    }
+
+    def test_lookups_run_concurrently(self):
+        # Every lookup waits for the other three, so this only passes if all
+        # four requests are in flight at once
+        barrier = threading.Barrier(len(self.bodies), timeout=5)
+
+        def handler(request):
+            barrier.wait()
+            return 200, self.bodies[request.url]
+
+        self.mount(handler)
+        overview = ck.get_overview("t")
+        self.assertEqual(overview, {
+            "devices": self.bodies[ck.URL_GET_DEVICES]["Devices"],
+            "endpoints": self.bodies[ck.URL_GET_ENDPOINTS]["Endpoints"],
+            "locations": self.bodies[ck.URL_GET_LOCATIONS],
+            "reports": self.bodies[ck.URL_GET_LOCATION_REPORTS],
+        })
+
+    def test_failed_lookup_raises(self):
+        self.mount(lambda r: (404, {}) if r.url == ck.URL_GET_LOCATIONS else (200, self.bodies[r.url]))
+        with self.assertRaises(requests.HTTPError):
+            ck.get_overview("t")
+
+
+if __name__ == '__main__':
+    unittest.main()